@@ -9,6 +9,7 @@ class GeneratorConfig(BaseModel):
     sdkOutput: str = ""
     modelsOutput: str = ""
     tests: bool = False
+    format: bool = True
 
 
 class BoreaConfig(BaseModel):
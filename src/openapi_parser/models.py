@@ -45,6 +45,7 @@ class Operation(BaseModel):
     description: str = ""
     parameters: List[HttpParameter] = Field(default_factory=list)
     request_body: Optional[SchemaMetadata] = None
+    response_type: Optional[str] = None  # Type of the successful JSON response
 
 
 class Info(BaseModel):
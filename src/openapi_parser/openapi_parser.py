@@ -1,8 +1,16 @@
 import json
-from typing import Any, Dict, List, Optional, Union
+from itertools import chain
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 from .models import *
 import click
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 
 class OpenAPIParser:
     """
@@ -13,10 +21,15 @@ class OpenAPIParser:
         """
         Initialize the parser by loading the OpenAPI specification.
         """
-        with open(openapi_path, "r") as f:
-            self.openapi_spec = json.load(f)
+        with open(openapi_path, "rb") as f:
+            self.openapi_spec = _json_loads(f.read())
         self.paths = self.openapi_spec.get("paths", {})
         self.components = self.openapi_spec.get("components", {}).get("schemas", {})
+        # Memoized $ref lookups, the same refs are shared by many operations
+        self._ref_names: Dict[str, str] = {}
+        self._resolved_components: Dict[str, Tuple[List[str], List[Dict[str, Any]]]] = (
+            {}
+        )
         self.tag = tag
         self.operation_id = operation_id
         self.openapi_path = openapi_path
@@ -26,28 +39,28 @@ class OpenAPIParser:
         Parse the OpenAPI spec and return a list of operations filtered by criteria.
         """
         operations = []
-        http_params = []
+        headers: List[HttpHeader] = []
+        seen_headers: Set[str] = set()
+        # Bind loop invariants to locals, this runs once per operation
+        operation_id_filter = self.operation_id
+        tag_filter = self.tag
+        parse_operation = self._parse_operation
+        add_unique_header = self._add_unique_header
         for path, methods in self.paths.items():
             for method, details in methods.items():
                 if "operationId" not in details:
                     continue
-                if self.operation_id != "" and self.operation_id != details.get(
-                    "operationId", ""
+                if (
+                    operation_id_filter
+                    and operation_id_filter != details["operationId"]
                 ):
                     continue
-                if self.tag != "" and self.tag not in details.get("tags", [""]):
+                if tag_filter and tag_filter not in details.get("tags", [""]):
                     continue
-                operation = self._parse_operation(path, method, details)
+                operation = parse_operation(path, method, details)
                 for http_param in operation.parameters:
-                    self._add_unique_http_param(
-                        http_params, http_param.model_dump(by_alias=True)
-                    )
+                    add_unique_header(headers, seen_headers, http_param)
                 operations.append(operation)
-        headers = [
-            HttpHeader(**http_param)
-            for http_param in http_params
-            if "header" in http_param["in"]
-        ]
         openapi = self.openapi_spec.get("openapi", "")
         info = self.openapi_spec.get("info", {})
         servers = self.openapi_spec.get("servers", [])
@@ -64,15 +77,19 @@ class OpenAPIParser:
             source_file=self.openapi_path,
         )
 
-    def _add_unique_http_param(
-        self, headers_list: List[Dict[str, Any]], new_header: Dict[str, Any]
+    def _add_unique_header(
+        self,
+        headers: List[HttpHeader],
+        seen: Set[str],
+        http_param: HttpParameter,
     ) -> None:
-        """Add a dictionary to the list only if 'name' and 'in' fields are unique."""
-        if not any(
-            h["name"] == new_header["name"] and h["in"] == new_header["in"]
-            for h in headers_list
-        ):
-            headers_list.append(new_header)
+        """Add a header parameter to the list only if its 'name' is unique."""
+        if http_param.in_location != "header":
+            return
+        name = http_param.name
+        if name not in seen:
+            seen.add(name)
+            headers.append(HttpHeader(**http_param.model_dump(by_alias=True)))
 
     def _parse_operation(
         self, path: str, method: str, details: Dict[str, Any]
@@ -89,6 +106,7 @@ class OpenAPIParser:
             description=details.get("description", ""),
             parameters=self._parse_parameters(details.get("parameters", [])),
             request_body=self._parse_request_body(details.get("requestBody", {})),
+            response_type=self._parse_response_type(details.get("responses", {})),
         )
 
     def _parse_parameters(
@@ -126,6 +144,19 @@ class OpenAPIParser:
         json_schema = content.get("application/json", {}).get("schema", {})
         return self._schema_metadata(json_schema)
 
+    def _parse_response_type(self, responses: Dict[str, Any]) -> Union[str, None]:
+        """
+        Resolve the type of the first successful JSON response, if any.
+        """
+        for status, response in responses.items():
+            if not status.startswith("2"):
+                continue
+            content = response.get("content", {})
+            json_schema = content.get("application/json", {}).get("schema")
+            if json_schema:
+                return self._resolve_type(json_schema)
+        return None
+
     def _schema_metadata(self, schema: Dict[str, Any]) -> SchemaMetadata:
         """
         Extract relevant metadata from a given schema.
@@ -133,8 +164,9 @@ class OpenAPIParser:
         required = schema.get("required")
         nullable = schema.get("nullable")
         json_schema_type = self._resolve_type(schema)
-        nested_json_schema_refs = self._extract_refs(schema)
-        nested_json_schemas = self._resolve_nested_types(schema)
+        nested_json_schema_refs, nested_json_schemas = self._resolve_nested_schemas(
+            schema
+        )
 
         return SchemaMetadata(
             required=required,
@@ -145,71 +177,84 @@ class OpenAPIParser:
             length_nested_json_schemas=len(nested_json_schemas),
         )
 
+    def _ref_name(self, ref: str) -> str:
+        """
+        Return the schema name a '$ref' points to, e.g. '#/components/schemas/Foo' -> 'Foo'.
+        """
+        name = self._ref_names.get(ref)
+        if name is None:
+            name = ref.rsplit("/", 1)[-1]
+            self._ref_names[ref] = name
+        return name
+
     def _resolve_type(self, schema: Dict[str, Any]) -> str:
         """
         Resolve and return the type of a given schema.
         """
         if "$ref" in schema:
-            return schema["$ref"].split("/")[-1]
+            return self._ref_name(schema["$ref"])
         if "allOf" in schema:
             return " & ".join([self._resolve_type(sub) for sub in schema["allOf"]])
         if "oneOf" in schema or "anyOf" in schema:
             return " | ".join(
                 [
                     self._resolve_type(sub)
-                    for sub in schema.get("oneOf", []) + schema.get("anyOf", [])
+                    for sub in chain(schema.get("oneOf", ()), schema.get("anyOf", ()))
                 ]
             )
         if "not" in schema:
             return f"Not[{self._resolve_type(schema['not'])}]"
         return schema.get("type", "any")
 
-    def _extract_refs(self, schema: Dict[str, Any]) -> List[str]:
-        """
-        Recursively extract referenced schema names.
-        """
-        refs = []
-        if "$ref" in schema:
-            ref_name = schema["$ref"].split("/")[-1]
-            refs.append(ref_name)
-            if ref_name in self.components:
-                refs.extend(self._extract_refs(self.components[ref_name]))
-        for key in ["allOf", "oneOf", "anyOf", "not"]:
-            if key in schema:
-                for sub_schema in (
-                    schema[key] if isinstance(schema[key], list) else [schema[key]]
-                ):
-                    refs.extend(self._extract_refs(sub_schema))
-        return refs
-
-    def _resolve_nested_types(self, schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _resolve_nested_schemas(
+        self, schema: Dict[str, Any]
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
-        Recursively resolve nested types within a schema, including all properties and nested properties.
+        Recursively collect the referenced schema names and the nested type schemas
+        within a schema in a single walk, including all properties and nested properties.
         Handles $ref, allOf, oneOf, anyOf, not, and properties within objects and arrays.
 
         Args:
             schema: The OpenAPI schema to resolve
 
         Returns:
-            List of resolved nested type schemas
+            Tuple of the referenced schema names and the resolved nested type schemas
         """
+        refs = []
         nested_types = []
         if "type" in schema:
             self._traverse_dict(schema)
             nested_types.append(schema)
         if "$ref" in schema:
-            ref_name = schema["$ref"].split("/")[-1]
+            ref_name = self._ref_name(schema["$ref"])
+            refs.append(ref_name)
             if ref_name in self.components:
-                nested_types.extend(
-                    self._resolve_nested_types(self.components[ref_name])
-                )
+                component_refs, component_types = self._resolve_component(ref_name)
+                refs.extend(component_refs)
+                nested_types.extend(component_types)
         for key in ["allOf", "oneOf", "anyOf", "not"]:
             if key in schema:
                 for sub_schema in (
                     schema[key] if isinstance(schema[key], list) else [schema[key]]
                 ):
-                    nested_types.extend(self._resolve_nested_types(sub_schema))
-        return nested_types
+                    sub_refs, sub_types = self._resolve_nested_schemas(sub_schema)
+                    refs.extend(sub_refs)
+                    nested_types.extend(sub_types)
+        return refs, nested_types
+
+    def _resolve_component(
+        self, ref_name: str
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Resolve a component schema once, later references reuse the result.
+        Resolving rewrites the component's nested $ref nodes in place, so a second
+        walk would find nothing new to resolve anyway.
+        """
+        resolved = self._resolved_components.get(ref_name)
+        if resolved is None:
+            resolved = self._resolve_nested_schemas(self.components[ref_name])
+            self._resolved_components[ref_name] = resolved
+        return resolved
 
     def _traverse_dict(
         self,
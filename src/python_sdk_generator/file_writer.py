@@ -1,9 +1,17 @@
 import json
+import shutil
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Set
 import fnmatch
 
 import click
+from datamodel_code_generator import (
+    DataModelType,
+    Error,
+    InputFileType,
+    LiteralType,
+    generate,
+)
 
 
 class ConfigurableFileWriter:
@@ -18,6 +26,8 @@ class ConfigurableFileWriter:
             Path(config_path) if config_path else Path("borea.config.json")
         )
         self.ignore_patterns: List[str] = []
+        # Directories already created or found, every file write checks its parent
+        self._directories: Set[str] = set()
         self._load_config()
 
     def _load_config(self) -> None:
@@ -62,6 +72,9 @@ class ConfigurableFileWriter:
         Returns:
             bool: True if directory was created or exists, False if ignored
         """
+        if path in self._directories:
+            return True
+
         path: Path = Path(path)
         should_ignore = self.should_ignore(str(path))
         if should_ignore:
@@ -70,6 +83,7 @@ class ConfigurableFileWriter:
 
         # If directory already exists, just check if it's ignored
         if path.exists():
+            self._directories.add(str(path))
             return not should_ignore
 
         # Check if parent directory exists and can be created if needed
@@ -79,6 +93,7 @@ class ConfigurableFileWriter:
 
         # Create the directory since parent exists and is not ignored
         path.mkdir(exist_ok=True)
+        self._directories.add(str(path))
         return True
 
     def write(self, path: str, content: str, mode: str = "w") -> bool:
@@ -87,8 +102,8 @@ class ConfigurableFileWriter:
 
         Args:
             path: The path where to write the file
-            content: The content to write
-            mode: The file opening mode (default: "w")
+            content: The content to write, encoded as UTF-8
+            mode: The file opening mode without "b" (default: "w")
 
         Returns:
             bool: True if file was written, False if ignored
@@ -102,19 +117,49 @@ class ConfigurableFileWriter:
         if not self.create_directory(str(parent)):
             return False
 
-        # Write the file
-        with open(path, mode) as f:
-            f.write(content)
+        # Write the file as pre-encoded bytes in a single call
+        with open(path, mode + "b") as f:
+            f.write(content.encode("utf-8"))
+        return True
+
+    def copy(self, source_path: str, path: str) -> bool:
+        """
+        Copy a file to path if it's not in the ignore list.
+        The content is streamed from disk instead of being read into memory.
+
+        Args:
+            source_path: The path of the file to copy
+            path: The path where to write the copy
+
+        Returns:
+            bool: True if file was copied, False if ignored
+        """
+        if self.should_ignore(path):
+            click.echo(f"Skipping ignored path: {path}")
+            return False
+
+        # Create parent directories if they don't exist
+        parent = Path(path).parent
+        if not self.create_directory(str(parent)):
+            return False
+
+        if Path(source_path).resolve() == Path(path).resolve():
+            return True
+        shutil.copyfile(source_path, path)
         return True
 
     def generate_python_models(
         self, models_dir: str, models_file_path: str, openapi_path: str
     ) -> bool:
         """
-        Generate Python models using datamodel-codegen.
+        Generate Python models using datamodel-code-generator.
+
+        Runs in-process through the library API rather than shelling out to
+        the datamodel-codegen CLI, which avoids starting a second interpreter.
 
         Args:
             models_dir: Directory where models should be generated
+            models_file_path: File name of the generated models module
             openapi_path: Path to the OpenAPI spec file
 
         Returns:
@@ -132,37 +177,33 @@ class ConfigurableFileWriter:
             click.echo(f"Skipping model generation: {models_path} is ignored")
             return False
 
-        import subprocess
-
-        cmd = [
-            "datamodel-codegen",
-            "--input-file-type",
-            "openapi",
-            "--input",
-            str(openapi_path),
-            "--output",
-            str(models_path),
-            "--use-standard-collections",
-            "--use-schema-description",
-            "--field-constraints",
-            "--strict-nullable",
-            "--wrap-string-literal",
-            "--enum-field-as-literal",
-            "one",
-            "--use-double-quotes",
-            "--use-default-kwarg",
-            "--use-annotated",
-            "--use-field-description",
-            "--output-model-type",
-            "pydantic_v2.BaseModel",
-            "--disable-timestamp",
-        ]
         try:
-            subprocess.run(cmd, check=True)
+            generate(
+                Path(openapi_path),
+                input_file_type=InputFileType.OpenAPI,
+                output=models_path,
+                output_model_type=DataModelType.PydanticV2BaseModel,
+                use_standard_collections=True,
+                use_schema_description=True,
+                field_constraints=True,
+                strict_nullable=True,
+                wrap_string_literal=True,
+                enum_field_as_literal=LiteralType.One,
+                use_double_quotes=True,
+                use_default_kwarg=True,
+                use_annotated=True,
+                use_field_description=True,
+                disable_timestamp=True,
+            )
             return True
-        except subprocess.CalledProcessError as e:
+        except Error as e:
             click.echo(f"Error generating models: {e}")
             return False
+        except Exception as e:
+            # Unexpected failures on unusual schemas (ValueError, KeyError, ...) are
+            # reported like the CLI used to, not raised out of the generator's workers
+            click.echo(f"Error generating models: {type(e).__name__}: {e}")
+            return False
 
     @classmethod
     def from_click_context(
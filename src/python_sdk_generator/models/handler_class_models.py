@@ -28,3 +28,5 @@ class HandlerClassPyJinja(BaseModel):
     http_params: List[HttpParameter] = Field(default_factory=[])
     request_body: Optional[SchemaMetadata] = None
     nested_schema: Optional[Dict[str, Any]] = None
+    enum_param_names: List[str] = Field(default_factory=list)
+    lookup_list_param: Optional[str] = None
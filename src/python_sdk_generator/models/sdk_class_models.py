@@ -22,4 +22,5 @@ class SdkClassPyJinja(BaseModel):
     class_description: str
     base_url: str
     http_headers: List[HttpHeader]
+    enum_header_names: List[str] = Field(default_factory=list)
     tags: List[OpenAPITagMetadata]
@@ -1,7 +1,8 @@
 import re
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import click
 import black
@@ -29,6 +30,19 @@ from ..openapi_parser.models import (
     SchemaMetadata,
 )
 
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_DELIMITERS_RE = re.compile(r"[-/.,|:; ]")
+_NON_WORD_RE = re.compile(r"[^\w]")
+_OPENAPI_TO_PY_TYPES = {
+    "string": "str",
+    "integer": "int",
+    "boolean": "bool",
+    "number": "float",
+    "array": "List",
+    "object": "Dict[str, Any]",
+}
+_UNDERSCORE_TABLE = str.maketrans("- ", "__")
+
 
 class SDKGenerator:
     def __init__(
@@ -38,18 +52,37 @@ class SDKGenerator:
         models_dir: Path,
         generate_tests: bool = True,
         config_path: Optional[str] = None,
+        format_code: bool = True,
     ):
         self.metadata = metadata
         self.output_dir = output_dir
         self.models_dir = models_dir
         self.generate_tests = generate_tests
+        self.format_code = format_code
         self.template_dir = Path(__file__).parent / "templates"
-        self.env = Environment(loader=FileSystemLoader(str(self.template_dir)))
+        # Templates don't change during a run, so skip the per-render mtime check
+        self.env = Environment(
+            loader=FileSystemLoader(str(self.template_dir)), auto_reload=False
+        )
         self.file_writer = ConfigurableFileWriter(config_path)
+        self._lower_names: Dict[str, str] = {}
+        # Resolved Python type per type name or $ref, both repeat across operations
+        self._type_names: Dict[str, str] = {}
+        # Schema key -> formatter, checked in order by format_type
+        self._type_formatters: Tuple[
+            Tuple[str, Callable[[Dict[str, Any]], Optional[str]]], ...
+        ] = (
+            ("$ref", self._format_ref_type),
+            ("type", self._format_typed_type),
+            ("allOf", self._format_all_of_type),
+            ("oneOf", self._format_one_of_type),
+            ("anyOf", self._format_any_of_type),
+            ("not", self._format_not_type),
+        )
 
     def _clean_lower(self, tag: str) -> str:
         """Clean tag name to be a valid Python identifier"""
-        return self._sanitize_string(tag).lower().replace(" ", "_").replace("-", "_")
+        return self._sanitize_lower(tag)
 
     def _clean_capitalize(self, name: str) -> str:
         """Clean name to be a valid Python identifier"""
@@ -60,22 +93,22 @@ class SDKGenerator:
 
     def _clean_parameter_name(self, name: str) -> str:
         """Clean parameter name to be a valid Python identifier"""
-        # Convert hyphens to underscores
-        return self._sanitize_string(name).replace("-", "_").replace(" ", "_").lower()
+        return self._sanitize_lower(name)
+
+    def _sanitize_lower(self, name: str) -> str:
+        """Sanitize and lowercase a name, memoized since tags and params repeat"""
+        # _sanitize_string already turns hyphens and spaces into underscores
+        cleaned = self._lower_names.get(name)
+        if cleaned is None:
+            cleaned = self._sanitize_string(name).lower()
+            self._lower_names[name] = cleaned
+        return cleaned
 
     def _clean_type_name(self, type_name: str) -> str:
         """Clean type name to be a valid Python type"""
         if "int" in type_name:
             return "int"
-        type_map = {
-            "string": "str",
-            "integer": "int",
-            "boolean": "bool",
-            "number": "float",
-            "array": "List",
-            "object": "Dict[str, Any]",
-        }
-        return type_map.get(type_name.lower(), type_name)
+        return _OPENAPI_TO_PY_TYPES.get(type_name.lower(), type_name)
 
     def _clean_file_name(self, name: str) -> str:
         """Clean name to be a valid file name"""
@@ -86,7 +119,7 @@ class SDKGenerator:
 
     def _clean_schema_name(self, name: str) -> str:
         """Clean name to be a valid Python identifier"""
-        return name.replace("-", "_").replace(" ", "_")
+        return name.translate(_UNDERSCORE_TABLE)
 
     def _replace_dashes_with_underscores(self, name: str) -> str:
         """Replace dashes with underscores"""
@@ -107,9 +140,9 @@ class SDKGenerator:
 
     def _sanitize_string(self, s: str) -> str:
         # Replace common delimiters with underscore
-        s = re.sub(r"[-/.,|:; ]", "_", s)
+        s = _DELIMITERS_RE.sub("_", s)
         # Remove all other special characters (keeping alphanumerics and underscores)
-        s = re.sub(r"[^\w]", "", s)
+        s = _NON_WORD_RE.sub("", s)
         return s
 
     def _get_tag_formats(self, tag: str) -> Tuple[str, str, str]:
@@ -149,45 +182,78 @@ class SDKGenerator:
         """Generate Pydantic models using datamodel-code-generator"""
 
     def format_type(self, type_info: Union[Dict, str, None]) -> str:
-        resolved_type: str = "Any"
-        if type_info is None:
-            pass
-        elif isinstance(type_info, str) and type_info not in ["object", "array"]:
-            resolved_type = self._clean_type_name(type_info)
-        elif isinstance(type_info, dict):
-            if "$ref" in type_info:
-                resolved_type = type_info["$ref"].split("/")[-1]
-            elif type_info.get("type") == "array":
-                resolved_type = f"List[{self.format_type(type_info.get('items', {}))}]"
-            elif "type" in type_info and type_info["type"] not in ["object", "array"]:
-                resolved_type = self._clean_type_name(type_info["type"])
-            elif "allOf" in type_info:
-                # TODO fix this when it hits
-                # not hitting...
-                resolved_type = " & ".join(
-                    (
-                        self.format_type(item)
-                        if isinstance(item, dict) and "$ref" not in item
-                        else item["$ref"].split("/")[-1]
-                    )
-                    for item in type_info["allOf"]
-                )
-            elif "oneOf" in type_info:
-                # not hitting...
-                resolved_type = f"Union[{', '.join(self.format_type(item) for item in type_info['oneOf'])}]"
-            elif "anyOf" in type_info:
-                # not hitting...
-                resolved_type = f"Union[{', '.join(self.format_type(item) for item in type_info['anyOf'])}]"
-            elif "not" in type_info:
-                # not hitting...
-                resolved_type = "Any"
-            else:
-                pass
-        else:
-            pass
-
+        if isinstance(type_info, str):
+            resolved_type = self._type_names.get(type_info)
+            if resolved_type is None:
+                if type_info in ("object", "array"):
+                    resolved_type = "Any"
+                else:
+                    resolved_type = self._clean_type_name(type_info)
+                self._type_names[type_info] = resolved_type
+            return resolved_type
+        if isinstance(type_info, dict):
+            # First matching key wins, a formatter returning None falls through
+            for key, formatter in self._type_formatters:
+                if key in type_info:
+                    resolved_type = formatter(type_info)
+                    if resolved_type is not None:
+                        return resolved_type
+        return "Any"
+
+    def _format_ref_type(self, type_info: Dict[str, Any]) -> str:
+        ref = type_info["$ref"]
+        resolved_type = self._type_names.get(ref)
+        if resolved_type is None:
+            resolved_type = ref.split("/")[-1]
+            self._type_names[ref] = resolved_type
         return resolved_type
 
+    def _format_typed_type(self, type_info: Dict[str, Any]) -> Optional[str]:
+        json_type = type_info["type"]
+        if json_type == "array":
+            # Unwrap nested arrays in a loop rather than recursing per level
+            depth = 1
+            items = type_info.get("items", {})
+            while (
+                isinstance(items, dict)
+                and "$ref" not in items
+                and items.get("type") == "array"
+            ):
+                depth += 1
+                items = items.get("items", {})
+            return "List[" * depth + self.format_type(items) + "]" * depth
+        if json_type == "object":
+            return None
+        return self._clean_type_name(json_type)
+
+    def _format_all_of_type(self, type_info: Dict[str, Any]) -> str:
+        # TODO fix this when it hits
+        # not hitting...
+        return " & ".join(
+            (
+                self.format_type(item)
+                if isinstance(item, dict) and "$ref" not in item
+                else item["$ref"].split("/")[-1]
+            )
+            for item in type_info["allOf"]
+        )
+
+    def _format_one_of_type(self, type_info: Dict[str, Any]) -> str:
+        # not hitting...
+        return (
+            f"Union[{', '.join(self.format_type(item) for item in type_info['oneOf'])}]"
+        )
+
+    def _format_any_of_type(self, type_info: Dict[str, Any]) -> str:
+        # not hitting...
+        return (
+            f"Union[{', '.join(self.format_type(item) for item in type_info['anyOf'])}]"
+        )
+
+    def _format_not_type(self, type_info: Dict[str, Any]) -> str:
+        # not hitting...
+        return "Any"
+
     def _get_single_nested_schema(
         self, schema: Union[SchemaMetadata, None]
     ) -> Union[Dict[str, Any], None]:
@@ -202,55 +268,77 @@ class SDKGenerator:
         return schema
 
     def _method_params_from_http_params(
-        self, http_params: List[HttpParameter], cond: Callable[[HttpParameter], bool]
-    ) -> List[MethodParameter]:
+        self, http_params: List[HttpParameter]
+    ) -> Tuple[List[MethodParameter], List[MethodParameter]]:
         """
-        Returns a list of MethodParameter objects based on the given condition.
+        Returns the required and optional MethodParameter objects, split in a single pass.
         """
-        return [
-            MethodParameter(
-                required=http_param.required,
+        required_params: List[MethodParameter] = []
+        optional_params: List[MethodParameter] = []
+        for http_param in http_params:
+            # Headers can be set once on the client, so they are never required per call,
+            # handlers check that the ones the spec requires are set in either place
+            is_required = (
+                http_param.required == True and http_param.in_location != "header"
+            )
+            method_param = MethodParameter(
+                required=is_required,
                 name=http_param.name,
                 original_name=http_param.original_name,
                 type=self.format_type(http_param.type),
                 description=http_param.description,
             )
-            for http_param in http_params
-            if cond(http_param)
-        ]
+            if is_required:
+                required_params.append(method_param)
+            else:
+                optional_params.append(method_param)
+        return required_params, optional_params
 
     def _method_params_from_schema_props(
         self,
         schema: Dict[str, Any],
-        props: List[Dict[str, Any]],
-        cond: Callable[[str, bool], bool],
-    ) -> List[MethodParameter]:
+        props: Dict[str, Dict[str, Any]],
+        excluded_names: Set[str],
+    ) -> Tuple[List[MethodParameter], List[MethodParameter]]:
+        """
+        Returns the required and optional MethodParameter objects, split in a single pass.
+        """
         default_description = "No description provided"
-        schema_required = schema.get("required", [])
-        is_required = lambda prop_name, prop: prop_name in schema_required or prop.get(
-            "required", False
+        # Set lookup per prop instead of scanning the required list each time
+        schema_required = schema.get("required", None)
+        required_names = (
+            frozenset(schema_required) if isinstance(schema_required, list) else ()
         )
-        return [
-            MethodParameter(
-                required=is_required(prop_name, prop),
+        required_params: List[MethodParameter] = []
+        optional_params: List[MethodParameter] = []
+        for prop_name, prop in props.items():
+            if prop_name in excluded_names:
+                continue
+            is_required = prop_name in required_names or prop.get("required", False)
+            method_param = MethodParameter(
+                required=is_required,
                 name=prop_name,
                 type=self.format_type(prop),
                 description=prop.get("description", None)
                 or prop.get("nested_json_schemas", [schema])[0].get("description", None)
                 or default_description,
             )
-            for prop_name, prop in props.items()
-            if cond(prop_name, is_required(prop_name, prop))
-        ]
+            if is_required:
+                required_params.append(method_param)
+            else:
+                optional_params.append(method_param)
+        return required_params, optional_params
 
     def _method_param_from_request_body(
         self, request_body: Dict[str, Any]
     ) -> List[MethodParameter]:
+        # Sent as is when given as plain JSON data or pre-serialized JSON bytes
+        body_type = self.format_type(request_body.get("type", None))
         return [
             MethodParameter(
                 required=request_body.get("required", False),
                 name="request_body",
-                type=self.format_type(request_body.get("type", None)),
+                type=f"Union[{body_type}, Dict[str, Any], List[Any], bytes]",
                 description=request_body.get("description", "Request body"),
             )
         ]
@@ -258,34 +346,20 @@ class SDKGenerator:
     def _resolve_method_params(
         self, operation: Operation, schema: Union[Dict[str, Any], None]
     ) -> Tuple[List[MethodParameter], List[MethodParameter]]:
-        required_http_params: List[MethodParameter] = (
-            self._method_params_from_http_params(
-                operation.parameters, lambda http_param: http_param.required == True
-            )
+        required_http_params, optional_http_params = (
+            self._method_params_from_http_params(operation.parameters)
         )
-        optional_http_params: List[MethodParameter] = (
-            self._method_params_from_http_params(
-                operation.parameters, lambda http_param: http_param.required != True
-            )
-        )
-        http_param_names = [param.name for param in operation.parameters]
+        http_param_names = {param.name for param in operation.parameters}
 
         required_schema_props: List[MethodParameter] = []
         optional_schema_props: List[MethodParameter] = []
         if schema is not None:
             schema_props = schema.get("properties", None)
             if schema_props:
-                required_schema_props += self._method_params_from_schema_props(
-                    schema,
-                    schema_props,
-                    lambda prop_name, is_required: is_required
-                    and prop_name not in http_param_names,
-                )
-                optional_schema_props += self._method_params_from_schema_props(
-                    schema,
-                    schema_props,
-                    lambda prop_name, is_required: not is_required
-                    and prop_name not in http_param_names,
+                required_schema_props, optional_schema_props = (
+                    self._method_params_from_schema_props(
+                        schema, schema_props, http_param_names
+                    )
                 )
             elif schema.get("required", False):
                 required_schema_props += self._method_param_from_request_body(schema)
@@ -316,6 +390,11 @@ class SDKGenerator:
             op.request_body.type = self._clean_type_name(op.request_body.type)
 
         http_params = op.parameters
+        # Enum members are sent by value, httpx only accepts str header values
+        schemas = self.metadata.components.schemas
+        enum_param_names = [
+            param.name for param in http_params if "enum" in schemas.get(param.type, {})
+        ]
         request_body = op.request_body
         schema: Union[Dict[str, Any], None] = self._get_single_nested_schema(
             op.request_body
@@ -336,12 +415,32 @@ class SDKGenerator:
             http_params=http_params,
             request_body=request_body,
             nested_schema=schema,
+            enum_param_names=enum_param_names,
+            lookup_list_param=self._lookup_list_param(op, schema),
         ).model_dump()
 
         return self._render_template_and_format_code(
             "handler_class.py.jinja", template_metadata=handler_metadata
         )
 
+    def _lookup_list_param(
+        self, operation: Operation, schema: Union[Dict[str, Any], None]
+    ) -> Union[str, None]:
+        """
+        Name of the body's only field when it is a required list and the response is
+        a list too, i.e. the ids of a bulk lookup, which handlers deduplicate and
+        answer locally when empty.
+        """
+        if operation.response_type != "array" or not schema:
+            return None
+        properties = schema.get("properties") or {}
+        if len(properties) != 1:
+            return None
+        name, prop = next(iter(properties.items()))
+        if prop.get("type") != "array" or name not in schema.get("required", ()):
+            return None
+        return name
+
     def _generate_tag_class(
         self,
         parent_class_name: str,
@@ -362,18 +461,45 @@ class SDKGenerator:
             "tag_class.py.jinja", template_metadata=template_metadata
         )
 
+    def _generate_base_handler(
+        self, parent_class_name: str, sdk_class_filename: str
+    ) -> str:
+        """Generate the base class shared by the tag and handler classes"""
+        template_metadata = {
+            "parent_class_name": parent_class_name,
+            "parent_filename": sdk_class_filename,
+        }
+
+        return self._render_template_and_format_code(
+            "base_handler.py.jinja", template_metadata=template_metadata
+        )
+
     def _generate_sdk_class(
         self, parent_class_name: str, tag_metadata: List[OpenAPITagMetadata]
     ) -> str:
         """Generate the base class for methods of tag in OpenAPI"""
         base_url = self.metadata.servers and self.metadata.servers[0].url or ""
-        http_headers = self.metadata.headers
+        http_headers = [
+            header.model_copy(
+                update={
+                    "name": self._clean_parameter_name(header.name),
+                    "original_name": header.name,
+                }
+            )
+            for header in self.metadata.headers
+        ]
+        # Enum members are sent by value, httpx only accepts str header values
+        schemas = self.metadata.components.schemas
+        enum_header_names = [
+            header.name for header in http_headers if "enum" in schemas.get(header.type, {})
+        ]
         template_metadata = SdkClassPyJinja(
             class_name=parent_class_name,
             class_title=self.metadata.info.title,
             class_description=self.metadata.info.description,
             base_url=base_url,
             http_headers=http_headers,
+            enum_header_names=enum_header_names,
             tags=tag_metadata,
         ).model_dump()
 
@@ -436,19 +562,21 @@ class SDKGenerator:
             click.echo(template_metadata)
             raise e
 
-        if format_with_black:
+        if format_with_black and self.format_code:
             try:
                 formatted_code = black.format_str(rendered_code, mode=black.Mode())
             except Exception as e:
                 click.echo(rendered_code)
                 raise e
             return formatted_code
+        elif format_with_black:
+            # Skipping black, only collapse the blank line runs left by the templates
+            return _BLANK_LINES_RE.sub("\n\n", rendered_code)
         else:
             return rendered_code
 
     def _generate_tests(self, tag: str, operations: List[Operation]) -> str:
         """Generate tests for a specific tag"""
-        template = self.env.get_template("test_client.py.jinja")
         template_metadata = {
             "tag": tag,
             "operations": operations,
@@ -486,20 +614,25 @@ class SDKGenerator:
 
         # Write the complete spec
         openapi_file = self.output_dir / "openapi.json"
-        self.file_writer.write(
-            str(openapi_file), json.dumps(self.metadata.openapi, indent=2)
-        )
+        self.file_writer.copy(self.metadata.source_file, str(openapi_file))
 
-        # Generate models
+        # Generate models in a worker process while the rest of the SDK is rendered,
+        # both are CPU bound and only share the spec file on disk
         openapi_path = str(Path(self.metadata.source_file))
         models_filename = "models"
         models_file_path = models_filename + file_ext
-        self.file_writer.generate_python_models(
-            models_dir=str(self.models_dir),
-            models_file_path=models_file_path,
-            openapi_path=openapi_path,
-        )
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            models_future = executor.submit(
+                self.file_writer.generate_python_models,
+                models_dir=str(self.models_dir),
+                models_file_path=models_file_path,
+                openapi_path=openapi_path,
+            )
+            self._generate_package(models_filename=models_filename, file_ext=file_ext)
+            models_future.result()
 
+    def _generate_package(self, models_filename: str, file_ext: str) -> None:
+        """Generate the schema files, handlers, tag classes and SDK class."""
         # Generate schema files
         self._generate_schema_files(models_filename=models_filename, file_ext=file_ext)
 
@@ -516,43 +649,58 @@ class SDKGenerator:
         parent_class_name = self._clean_capitalize(self.metadata.info.title)
         sdk_class_filename = self._clean_file_name(self.metadata.info.title)
 
+        # Generate the shared handler base class (_base.py)
+        base_handler_file_path = src_dir / ("_base" + file_ext)
+        base_handler_content = self._generate_base_handler(
+            parent_class_name=parent_class_name,
+            sdk_class_filename=sdk_class_filename,
+        )
+        self.file_writer.write(str(base_handler_file_path), base_handler_content)
+
         # Generate handlers (tag/<operation_id>/<operation_id>.py)
+        # Bind loop invariants to locals, this runs once per operation
+        create_directory = self.file_writer.create_directory
+        write = self.file_writer.write
+        get_tag_formats = self._get_tag_formats
+        clean_capitalize = self._clean_capitalize
+        generate_handler_class = self._generate_handler_class
+        generate_tests = self.generate_tests
         operation_metadata_by_tag: Dict[str, List[OperationMetadata]] = {}
         for op in self.metadata.operations:
             tag_name = op.tag
-            tag_dir, tag_class_name, tag_filename = self._get_tag_formats(tag_name)
+            tag_dir, tag_class_name, tag_filename = get_tag_formats(tag_name)
             tag_dir_path = src_dir / tag_dir
             handler_filename = op.operation_id
             handler_dir = handler_filename
             handler_file_dir_path = tag_dir_path / handler_dir
-            self.file_writer.create_directory(str(handler_file_dir_path))
+            create_directory(str(handler_file_dir_path))
             handler_file = handler_filename + file_ext
             handler_file_path = handler_file_dir_path / handler_file
-            handler_class_name = self._clean_capitalize(handler_filename)
+            handler_class_name = clean_capitalize(handler_filename)
             operation_metadata = OperationMetadata(
                 handler_dir=handler_dir,
                 handler_filename=handler_filename,
                 handler_class_name=handler_class_name,
             )
-            operation_handler_content = self._generate_handler_class(
+            operation_handler_content = generate_handler_class(
                 op, parent_class_name, sdk_class_filename, operation_metadata
             )
-            self.file_writer.write(str(handler_file_path), operation_handler_content)
-            if tag_name not in operation_metadata_by_tag:
-                operation_metadata_by_tag[tag_name] = []
-            operation_metadata_by_tag[tag_name].append(operation_metadata)
+            write(str(handler_file_path), operation_handler_content)
+            operation_metadata_by_tag.setdefault(tag_name, []).append(
+                operation_metadata
+            )
 
             # TODO: not implemented
             # Generate tests
-            if self.generate_tests:
+            if generate_tests:
                 tag_test_dir_path = test_dir / tag_dir
                 handler_test_file_dir_path = tag_test_dir_path / handler_filename
-                self.file_writer.create_directory(str(handler_test_file_dir_path))
+                create_directory(str(handler_test_file_dir_path))
                 handler_test_file = handler_filename + "_test" + file_ext
                 handler_test_file_path = handler_test_file_dir_path / handler_test_file
                 test_content = ""
                 # test_content = self._generate_tests(tag, operations)
-                self.file_writer.write(str(handler_test_file_path), test_content)
+                write(str(handler_test_file_path), test_content)
 
         tag_metadata: List[OpenAPITagMetadata] = []
         for tag in self.metadata.tags:
@@ -648,12 +796,19 @@ default_models_dir = "models"
 @click.option(
     "--config", default="borea.config.json", type=str, help="Path to borea.config.json"
 )
+@click.option(
+    "--format/--no-format",
+    "format_code",
+    default=None,
+    help="Format generated code with black (default: True)",
+)
 def main(
     input_file: Optional[str],
     sdk_output: Optional[str],
     models_output: Optional[str],
     tests: Optional[bool],
     config: Optional[str],
+    format_code: Optional[bool],
 ):
     """Generate a Python SDK from an OpenAPI specification."""
     # Load borea config values
@@ -680,6 +835,8 @@ def main(
         / (models_output or borea_config.generator.modelsOutput or default_models_dir)
     )
     tests = tests or borea_config.generator.tests or default_tests
+    if format_code is None:
+        format_code = borea_config.generator.format
 
     parser = OpenAPIParser(openapi_input_path)
     metadata = parser.parse()
@@ -690,6 +847,7 @@ def main(
         models_dir=models_output_path,
         generate_tests=tests,
         config_path=config,
+        format_code=format_code,
     )
     generator.generate()
 
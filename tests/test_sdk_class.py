@@ -0,0 +1,146 @@
+import importlib
+import socket
+import sys
+import zlib
+from pathlib import Path
+
+import httpcore
+import httpx
+import pytest
+from jinja2 import Environment, FileSystemLoader
+
+TEMPLATES_DIR = (
+    Path(__file__).parent.parent / "src" / "python_sdk_generator" / "templates"
+)
+BASE_URL = "https://api.example.com"
+ADDRESSES = ("10.0.0.1", "10.0.0.2")
+
+
+@pytest.fixture(scope="module")
+def sdk_module(tmp_path_factory):
+    """The rendered SDK client class, in a package laid out like a generated SDK"""
+    root = tmp_path_factory.mktemp("sdk")
+    package = root / "rendered_sdk"
+    (package / "models").mkdir(parents=True)
+    (package / "src").mkdir()
+    for init in ("__init__.py", "models/__init__.py", "src/__init__.py"):
+        (package / init).write_text("")
+    (package / "models" / "models.py").write_text("")
+    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+    (package / "src" / "sdk.py").write_text(
+        env.get_template("sdk_class.py.jinja").render(
+            class_name="TestApi",
+            class_title="Test API",
+            class_description="",
+            base_url=BASE_URL,
+            http_headers=[],
+            enum_header_names=[],
+            tags=[],
+        )
+    )
+    sys.path.insert(0, str(root))
+    try:
+        yield importlib.import_module("rendered_sdk.src.sdk")
+    finally:
+        sys.path.remove(str(root))
+
+
+@pytest.fixture
+def two_upstreams(monkeypatch):
+    """Resolve every host to two addresses"""
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))
+            for address in ADDRESSES
+        ]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+
+
+@pytest.fixture
+def no_proxies(monkeypatch):
+    """Clear the proxy environment variables"""
+    for scheme in ("http", "https", "all", "no"):
+        monkeypatch.delenv(f"{scheme}_proxy", raising=False)
+        monkeypatch.delenv(f"{scheme.upper()}_PROXY", raising=False)
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Requests handed to an HTTPTransport, with the transport's connection pool"""
+    sent = []
+
+    def handle_request(transport, request):
+        sent.append((transport._pool, request))
+        return httpx.Response(200, json={}, request=request)
+
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", handle_request)
+    return sent
+
+
+def test_affinity_header_pins_proxied_requests(
+    sdk_module, two_upstreams, no_proxies, sent, monkeypatch
+):
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.example.com:3128")
+
+    client = sdk_module.TestApi(affinity_header="TR-Dataset")
+    client._make_request("GET", "/api/dataset", headers={"TR-Dataset": "dataset"})
+
+    pool, request = sent[0]
+    assert isinstance(pool, httpcore.HTTPProxy)
+    assert request.url.host == ADDRESSES[zlib.crc32(b"dataset") % len(ADDRESSES)]
+    assert request.headers["Host"] == "api.example.com"
+    assert request.extensions["sni_hostname"] == "api.example.com"
+
+
+def test_affinity_header_falls_back_to_host_name(
+    sdk_module, two_upstreams, no_proxies, monkeypatch
+):
+    hosts = []
+
+    def handle_request(transport, request):
+        hosts.append(request.url.host)
+        if request.url.host in ADDRESSES:
+            raise httpx.ConnectError("Connection refused", request=request)
+        return httpx.Response(200, json={}, request=request)
+
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", handle_request)
+    client = sdk_module.TestApi(affinity_header="TR-Dataset")
+    response = client._make_request(
+        "GET", "/api/dataset", headers={"TR-Dataset": "dataset"}
+    )
+
+    assert response.status_code == 200
+    assert hosts[1:] == ["api.example.com"]
+    assert client._upstreams.expired()
+
+
+def test_posts_clear_the_cache_unless_read_only(sdk_module, no_proxies, sent):
+    client = sdk_module.TestApi(cache_ttl=60, cache_post_paths={"/api/chunk/search": 0})
+    client._make_request("GET", "/api/dataset")
+
+    client._make_request("POST", "/api/chunk/search", json_data={"query": "q"})
+    assert client._cache
+
+    client._make_request("POST", "/api/chunk", json_data={"chunk_html": "c"})
+    assert not client._cache
+
+
+def test_cache_is_keyed_by_headers_hooks_add(sdk_module, no_proxies, sent):
+    tenant = {"id": "a"}
+    responses = []
+
+    def before_request(request):
+        request.headers["X-Tenant"] = tenant["id"]
+
+    client = sdk_module.TestApi(
+        cache_ttl=60, before_request=before_request, after_request=responses.append
+    )
+    client._make_request("GET", "/api/dataset")
+    client._make_request("GET", "/api/dataset")
+    tenant["id"] = "b"
+    client._make_request("GET", "/api/dataset")
+
+    assert [request.headers["X-Tenant"] for _, request in sent] == ["a", "b"]
+    assert len(responses) == 3